@@ -3,15 +3,16 @@ and write them to a .txt blocklist
 """
 from __future__ import annotations
 
+import asyncio
 import datetime
-import ipaddress
 import itertools
-import json
 import logging
 import re
 import socket
 import time
 
+import aiohttp
+import orjson
 import requests
 import tldextract
 from selenium.common.exceptions import TimeoutException
@@ -21,6 +22,18 @@ from selenium.webdriver.chrome.options import Options
 logger = logging.getLogger()
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
+_ZWSP_TABLE = dict.fromkeys([0x200B, 0x200C, 0x200D, 0xFEFF], None)
+_IPV4_RE = re.compile(r"\d{1,3}(?:\.\d{1,3}){3}")
+
+SCAM_WEBSITES_URL = "https://www.globalantiscam.org/scam-websites"
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
+)
+API_ENDPOINT = (
+    "https://www.globalantiscam.org/_api/cloud-data/v1/wix-data/collections/query"
+)
+
 
 def current_datetime_str() -> str:
     """Current time's datetime string in UTC
@@ -42,17 +55,17 @@ def clean_url(url: str) -> str:
         str: URL without zero width spaces, leading/trailing whitespaces, trailing slashes,
     and URL prefixes.
     """
-    removed_zero_width_spaces = re.sub(r"[\u200B-\u200D\uFEFF]", "", url)
-    removed_leading_and_trailing_whitespaces = removed_zero_width_spaces.strip()
-    removed_trailing_slashes = removed_leading_and_trailing_whitespaces.rstrip("/")
-    removed_https = re.sub(r"^[Hh][Tt][Tt][Pp][Ss]:\/\/", "", removed_trailing_slashes)
-    removed_http = re.sub(r"^[Hh][Tt][Tt][Pp]:\/\/", "", removed_https)
+    cleaned = url.translate(_ZWSP_TABLE).strip().rstrip("/")
+    if cleaned[:8].lower() == "https://":
+        cleaned = cleaned[8:]
+    if cleaned[:7].lower() == "http://":
+        cleaned = cleaned[7:]
+    return cleaned
 
-    return removed_http
 
-
-def get_sv_session() -> str | None:
+def get_sv_session_from_browser() -> str | None:
     """Retrieve `svSession` session token from globalantiscam.org
+    by loading the page in a headless browser
 
     Returns:
         str | None: `svSession` session token if it exists, otherwise None.
@@ -62,7 +75,7 @@ def get_sv_session() -> str | None:
     browser = Chrome(options=options)
 
     try:
-        browser.get("https://www.globalantiscam.org/scam-websites")
+        browser.get(SCAM_WEBSITES_URL)
         time.sleep(15)
     except TimeoutException:
         return None
@@ -72,21 +85,49 @@ def get_sv_session() -> str | None:
     return None
 
 
-def get_page(svSession: str, offset: int = 0) -> requests.Response:
-    """Retrieve data from globalantiscam.org Scam URL API
-    from a given datapoint index `offset`
+def get_sv_session(use_browser_fallback: bool = True) -> str | None:
+    """Retrieve `svSession` session token from globalantiscam.org
+
+    The token is read from the cookies set by a plain HTTP request, which avoids
+    launching a browser. If no token is set this way, the page is loaded in
+    a headless browser instead, unless `use_browser_fallback` is False.
 
     Args:
-        svSession (str): To authenticate the API call.
-        offset (int, optional): Datapoint index to start from. This is necessary
-        because of a server-side enforced maximum page size limit. Defaults to 0.
+        use_browser_fallback (bool, optional): Whether to fall back to a headless
+        browser if the HTTP request does not yield a token. Defaults to True.
 
     Returns:
-        requests.Response: API response data
+        str | None: `svSession` session token if it exists, otherwise None.
+    """
+    try:
+        with requests.Session() as session:
+            session.get(
+                SCAM_WEBSITES_URL, headers={"User-Agent": USER_AGENT}, timeout=30
+            )
+            # The cookie may be set for more than one domain, in which case
+            # `session.cookies.get` raises CookieConflictError
+            sv_session = next(
+                (c.value for c in session.cookies if c.name == "svSession"), None
+            )
+    except requests.RequestException as error:
+        logger.warning("Unable to retrieve svSession over HTTP: %s", error)
+        sv_session = None
+
+    if sv_session or not use_browser_fallback:
+        return sv_session
+    return get_sv_session_from_browser()
+
+
+def page_query(offset: int) -> bytes:
+    """Build globalantiscam.org Scam URL API query payload
+    starting from a given datapoint index `offset`
+
+    Args:
+        offset (int): Datapoint index to start from.
+
+    Returns:
+        bytes: JSON-encoded query payload.
     """
-    endpoint = (
-        "https://www.globalantiscam.org/_api/cloud-data/v1/wix-data/collections/query"
-    )
     data = {
         "collectionName": "scamcompanies",
         "dataQuery": {
@@ -94,37 +135,76 @@ def get_page(svSession: str, offset: int = 0) -> requests.Response:
             "paging": {"offset": offset, "limit": 1000},
         },
     }
-    cookies = {"svSession": svSession}
-    return requests.post(endpoint, json.dumps(data), cookies=cookies, timeout=30)
+    return orjson.dumps(data)
 
 
-def retrieve_dataset(
-    svSession: str, first_page_response: requests.Response
-) -> list[dict]:
-    """Retrieve all data from globalantiscam.org Scam URL API
+async def get_page(
+    session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, offset: int = 0
+) -> dict:
+    """Retrieve data from globalantiscam.org Scam URL API
+    from a given datapoint index `offset`
 
     Args:
-        svSession (str): To authenticate the API call.
-        first_page_response (requests.Response): API data response from first page.
+        session (aiohttp.ClientSession): Session holding the `svSession` cookie.
+        semaphore (asyncio.Semaphore): Limits the number of concurrent requests.
+        offset (int, optional): Datapoint index to start from. This is necessary
+        because of a server-side enforced maximum page size limit. Defaults to 0.
+
+    Raises:
+        OSError: Page could not be retrieved.
 
     Returns:
-        list[dict]: List of all API responses as JSON.
+        dict: API response body.
     """
-    first_page_body = first_page_response.json()
+    # Acquire a slot before sending so the request timeout
+    # does not count time spent waiting for other pages
+    async with semaphore:
+        async with session.post(
+            API_ENDPOINT,
+            data=page_query(offset),
+            headers={"Content-Type": "application/json"},
+        ) as response:
+            if response.status != 200:
+                logger.error("Page status code: %d", response.status)
+                raise OSError(f"Unable to retrieve page at offset {offset}")
+            return orjson.loads(await response.read())
+
+
+async def retrieve_dataset(svSession: str) -> list[list[dict]]:
+    """Retrieve all items from globalantiscam.org Scam URL API
 
-    # From the first page body, determine number of pages to fetch
-    # (Each page has a maximum size of `page_limit`)
-    page_limit = 1000  # limit enforced by server-side
-    if "totalResults" in first_page_body:
-        total_results = first_page_body["totalResults"]
-        num_offsets = total_results // page_limit
+    Args:
+        svSession (str): To authenticate the API call.
 
-    bodies: list[dict] = [first_page_body]
-    for offset in range(1, num_offsets + 1):
-        response = get_page(svSession, offset=offset * page_limit)
-        body = response.json() if response.status_code == 200 else {}
-        bodies.append(body)
-    return bodies
+    Raises:
+        OSError: Any page could not be retrieved.
+
+    Returns:
+        list[list[dict]]: List of items from each API response page.
+    """
+    # All pages share one connection pool, at most 8 requests at a time
+    semaphore = asyncio.Semaphore(8)
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit_per_host=8, ttl_dns_cache=300),
+        cookies={"svSession": svSession},
+        timeout=aiohttp.ClientTimeout(total=30),
+    ) as session:
+        first_page_body = await get_page(session, semaphore, offset=0)
+
+        # From the first page body, determine number of pages to fetch
+        # (Each page has a maximum size of `page_limit`)
+        page_limit = 1000  # limit enforced by server-side
+        if "totalResults" in first_page_body:
+            total_results = first_page_body["totalResults"]
+            num_offsets = total_results // page_limit
+
+        bodies = await asyncio.gather(
+            *(
+                get_page(session, semaphore, offset=offset * page_limit)
+                for offset in range(1, num_offsets + 1)
+            )
+        )
+    return [body.get("items", []) for body in (first_page_body, *bodies)]
 
 
 def extract_scam_urls() -> set[str]:
@@ -134,30 +214,30 @@ def extract_scam_urls() -> set[str]:
         set[str]: Unique scam URLs.
     """
     try:
-        svSession = get_sv_session()
-        if not svSession:
-            raise OSError("svSession token not available")
-
-        first_page_response = get_page(svSession, offset=0)
-        if first_page_response.status_code != 200:
-            logger.error("Page status code: %d", first_page_response.status_code)
-            raise OSError("Unable to retrieve first page")
-
-        bodies = retrieve_dataset(svSession, first_page_response)
+        # A token set over plain HTTP may still be rejected by the API,
+        # so retry once with a token from the browser if it does not work
+        svSession = get_sv_session(use_browser_fallback=False)
+        pages: list[list[dict]] | None = None
+        if svSession:
+            try:
+                pages = asyncio.run(retrieve_dataset(svSession))
+            except OSError as error:
+                logger.warning("HTTP svSession token not usable: %s", error)
+        if pages is None:
+            svSession = get_sv_session_from_browser()
+            if not svSession:
+                raise OSError("svSession token not available")
+            pages = asyncio.run(retrieve_dataset(svSession))
 
         # Manual cleaning
-        all_items = list(
-            itertools.chain.from_iterable(
-                body["items"] for body in bodies if "items" in body
-            )
-        )
-        raw_urls = [x["url"].strip(" \t\v\n\r\f.") for x in all_items if "url" in x]
-        lines = (re.sub("\\s+", " ", line) for line in raw_urls)
-        urls = set(
-            y
-            for x in itertools.chain.from_iterable(line.split(" ") for line in lines)
-            if (y := clean_url(x.strip(" \t\v\n\r\f."))) and y != "www"
-        )
+        urls: set[str] = set()
+        for item in itertools.chain.from_iterable(pages):
+            if "url" not in item:
+                continue
+            # Split on runs of whitespace, then strip each candidate once
+            for x in item["url"].split():
+                if (y := clean_url(x.strip(" \t\v\n\r\f."))) and y != "www":
+                    urls.add(y)
 
         return urls
     except Exception as error:
@@ -165,9 +245,29 @@ def extract_scam_urls() -> set[str]:
         return set()
 
 
+def add_ipv4(ip_set: set[tuple[int, str]], address: str) -> bool:
+    """Add `address` to `ip_set` alongside its integer value if it is a valid
+    IPv4 address
+
+    Args:
+        ip_set (set[tuple[int, str]]): IPv4 addresses and their integer values.
+        address (str): Possible IPv4 address.
+
+    Returns:
+        bool: True if `address` is a valid IPv4 address, otherwise False.
+    """
+    try:
+        packed_ip = socket.inet_pton(socket.AF_INET, address)
+    except socket.error:
+        return False
+    ip_set.add((int.from_bytes(packed_ip, "big"), address))
+    return True
+
+
 if __name__ == "__main__":
     urls: set[str] = extract_scam_urls()
-    ips: set[str] = set()
+    # IPv4 addresses are kept alongside their integer values for sorting
+    ips: set[tuple[int, str]] = set()
     non_ips: set[str] = set()
     fqdns: set[str] = set()
     registered_domains: set[str] = set()
@@ -175,6 +275,9 @@ if __name__ == "__main__":
     if not urls:
         raise ValueError("Failed to scrape URLs")
     for url in urls:
+        if _IPV4_RE.fullmatch(url) and add_ipv4(ips, url):
+            # Bare IPv4 Address -> skip public suffix lookup
+            continue
         res = tldextract.extract(url)
         registered_domain, domain, fqdn = (
             res.registered_domain,
@@ -183,12 +286,8 @@ if __name__ == "__main__":
         )
         if domain and not fqdn:
             # Possible IPv4 Address
-            try:
-                socket.inet_pton(socket.AF_INET, domain)
-                ips.add(domain)
-            except socket.error:
-                # Is invalid URL and invalid IP -> skip
-                pass
+            # (Is invalid URL and invalid IP -> skip)
+            add_ipv4(ips, domain)
         elif fqdn:
             non_ips.add(url)
             fqdns.add(fqdn)
@@ -200,7 +299,7 @@ if __name__ == "__main__":
         non_ips_timestamp: str = current_datetime_str()
         non_ips_filename = "global-anti-scam-org-scam-urls.txt"
         with open(non_ips_filename, "w") as f:
-            f.writelines("\n".join(sorted(non_ips)))
+            f.write("".join(f"{u}\n" for u in sorted(non_ips)))
             logger.info(
                 "%d non-IPs written to %s at %s",
                 len(non_ips),
@@ -211,7 +310,7 @@ if __name__ == "__main__":
         ips_timestamp: str = current_datetime_str()
         ips_filename = "global-anti-scam-org-scam-ips.txt"
         with open(ips_filename, "w") as f:
-            f.writelines("\n".join(sorted(ips, key=ipaddress.IPv4Address)))
+            f.write("".join(f"{ip}\n" for _, ip in sorted(ips)))
             logger.info(
                 "%d IPs written to %s at %s", len(ips), ips_filename, ips_timestamp
             )
@@ -219,7 +318,7 @@ if __name__ == "__main__":
         fqdns_timestamp: str = current_datetime_str()
         fqdns_filename = "global-anti-scam-org-scam-urls-pihole.txt"
         with open(fqdns_filename, "w") as f:
-            f.writelines("\n".join(sorted(fqdns)))
+            f.write("".join(f"{fqdn}\n" for fqdn in sorted(fqdns)))
             logger.info(
                 "%d FQDNs written to %s at %s",
                 len(fqdns),
@@ -230,7 +329,7 @@ if __name__ == "__main__":
         registered_domains_timestamp: str = current_datetime_str()
         registered_domains_filename = "global-anti-scam-org-scam-urls-UBL.txt"
         with open(registered_domains_filename, "w") as f:
-            f.writelines("\n".join(f"*://*.{r}/*" for r in sorted(registered_domains)))
+            f.write("".join(f"*://*.{r}/*\n" for r in sorted(registered_domains)))
             logger.info(
                 "%d Registered Domains written to %s at %s",
                 len(registered_domains),